@@ -11,29 +11,230 @@ Author: Stock Trading Strategy Project
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import os
 
+try:
+    import bottleneck as bn
+except ImportError:
+    # Bottleneck is optional; a pandas rolling max is used without it.
+    bn = None
+
+try:
+    import numexpr as ne
+except ImportError:
+    # NumExpr is optional; plain numpy expressions are used without it.
+    ne = None
+
+# Below this length NumExpr's startup overhead outweighs its fused kernels
+NUMEXPR_MIN_LEN = 5000
+
+try:
+    from numba import njit, types
+
+    # Explicit signature for _simulate. The price/signal inputs are declared
+    # readonly because pandas hands out read-only views from to_numpy().
+    _SIMULATE_SIG = types.Tuple((
+        types.float64[:], types.float64[:], types.float64[:],
+        types.int64[:], types.float64[:], types.float64[:],
+        types.int8[:], types.float64[:],
+    ))(
+        types.Array(types.float64, 1, 'C', readonly=True),
+        types.Array(types.int64, 1, 'C', readonly=True),
+        types.float64, types.float64, types.boolean,
+    )
+except ImportError:
+    # Numba is optional: without it the simulation loop still runs as
+    # plain Python, just without the JIT speedup.
+    _SIMULATE_SIG = None
+
+    def njit(*args, **kwargs):
+        def wrapper(func):
+            return func
+        return wrapper
+
+
+# The explicit signature makes Numba compile eagerly at import instead of
+# lazily on the first call; together with cache=True the compiled kernel is
+# loaded straight from the on-disk cache on every run after the first, so
+# one-shot CLI invocations skip the 1-3s JIT warmup.
+@njit(_SIMULATE_SIG, cache=True, fastmath=True)
+def _simulate(prices, signals, initial_capital, commission, fractional):
+    """
+    Core bar-by-bar simulation loop, compiled with Numba.
+
+    Walks the price/signal arrays once, buying on signal == 1 when flat
+    and selling everything on signal == -1 when holding. Trade events are
+    accumulated into fixed-size arrays (at most one trade per bar) and
+    sliced to the actual trade count before returning.
+
+    Parameters:
+    -----------
+    prices : numpy.ndarray (float64)
+        Price per bar
+    signals : numpy.ndarray (int64)
+        Signal per bar (1 = buy, -1 = sell, 0 = hold)
+    initial_capital : float
+        Starting cash
+    commission : float
+        Commission rate per trade as decimal
+    fractional : bool
+        Allow fractional share quantities instead of flooring to whole
+        shares
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (cash_arr, shares_arr, pv_arr,
+         trade_idx, trade_shares, trade_prices, trade_action, trade_commission)
+    """
+    n = len(prices)
+
+    cash_arr = np.empty(n)
+    shares_arr = np.empty(n)
+    pv_arr = np.empty(n)
+
+    # Fixed-size trade buffers (n is an upper bound on the trade count)
+    trade_idx = np.empty(n, dtype=np.int64)
+    trade_shares = np.empty(n)
+    trade_prices = np.empty(n)
+    trade_action = np.empty(n, dtype=np.int8)  # +1 = buy, -1 = sell
+    trade_commission = np.empty(n)
+    n_trades = 0
+
+    cash = initial_capital
+    shares = 0.0
+    one_minus_c = 1.0 - commission  # hoisted out of the loop
+
+    for i in range(n):
+        price = prices[i]
+        signal = signals[i]
+
+        if signal == 1 and shares == 0:  # Buy signal and not already holding
+            # Size the position so cost + commission fits in cash;
+            # commission is charged on the trade notional, not the full
+            # cash balance
+            if fractional:
+                shares_to_buy = cash * one_minus_c / price
+            else:
+                shares_to_buy = float(int(cash * one_minus_c / price))
+
+            if shares_to_buy > 0:
+                cost = shares_to_buy * price
+                commission_cost = cost * commission
+                cash -= (cost + commission_cost)
+                shares += shares_to_buy
+
+                trade_idx[n_trades] = i
+                trade_shares[n_trades] = shares_to_buy
+                trade_prices[n_trades] = price
+                trade_action[n_trades] = 1
+                trade_commission[n_trades] = commission_cost
+                n_trades += 1
+
+        elif signal == -1 and shares > 0:  # Sell signal and holding shares
+            proceeds = shares * price
+            commission_cost = proceeds * commission
+            cash += (proceeds - commission_cost)
+
+            trade_idx[n_trades] = i
+            trade_shares[n_trades] = shares
+            trade_prices[n_trades] = price
+            trade_action[n_trades] = -1
+            trade_commission[n_trades] = commission_cost
+            n_trades += 1
+
+            shares = 0.0
+
+        cash_arr[i] = cash
+        shares_arr[i] = shares
+        pv_arr[i] = cash + (shares * price)
+
+    return (cash_arr, shares_arr, pv_arr,
+            trade_idx[:n_trades], trade_shares[:n_trades],
+            trade_prices[:n_trades], trade_action[:n_trades],
+            trade_commission[:n_trades])
+
+
+def max_drawdown_windowed(pv, lookback):
+    """
+    Maximum drawdown measured against a rolling peak instead of the
+    all-time peak.
+
+    Uses Bottleneck's O(n) monotonic-deque move_max when available;
+    falls back to a pandas rolling max otherwise.
+
+    Parameters:
+    -----------
+    pv : numpy.ndarray
+        Portfolio value per bar
+    lookback : int
+        Window length (in bars) for the rolling peak
+
+    Returns:
+    --------
+    float
+        Worst drawdown relative to the rolling peak (negative number)
+    """
+    if bn is not None:
+        rolling_peak = bn.move_max(pv, window=lookback, min_count=1)
+    else:
+        rolling_peak = pd.Series(pv).rolling(lookback, min_periods=1).max().to_numpy()
+    drawdown = (pv - rolling_peak) / rolling_peak
+    return drawdown.min()
+
+
+def _run_single(args):
+    """Worker for Backtest.run_many: backtest one ticker in a subprocess."""
+    (ticker, data, initial_capital, commission, risk_free_rate,
+     drawdown_lookback, fractional_shares, price_column) = args
+    engine = Backtest(initial_capital, commission, risk_free_rate,
+                      drawdown_lookback, fractional_shares)
+    return ticker, engine.run_backtest(data, price_column)
+
 
 class Backtest:
     """
     A simple backtesting engine for trading strategies.
     """
     
-    def __init__(self, initial_capital=10000, commission=0.001):
+    def __init__(self, initial_capital=10000, commission=0.001, risk_free_rate=0.02,
+                 drawdown_lookback=None, fractional_shares=False):
         """
         Initialize the backtesting engine.
-        
+
         Parameters:
         -----------
         initial_capital : float
             Starting capital for the backtest (default: $10,000)
         commission : float
             Commission rate per trade as decimal (default: 0.1% = 0.001)
+        risk_free_rate : float
+            Annual risk-free rate for the Sharpe ratio (default: 2% = 0.02)
+        drawdown_lookback : int, optional
+            Window in bars for a rolling-peak max drawdown metric
+            (default: None, all-time peak only)
+        fractional_shares : bool
+            Allow fractional share quantities on buys instead of flooring
+            to whole shares (default: False)
         """
         self.initial_capital = initial_capital
         self.commission = commission
-        self.trades = []
+        self.risk_free_rate = risk_free_rate
+        self.drawdown_lookback = drawdown_lookback
+        self.fractional_shares = fractional_shares
+        self.trades = pd.DataFrame()
         self.portfolio_values = []
+        # Raw tracking arrays from the last run (set by run_backtest)
+        self._cash = np.empty(0)
+        self._shares = np.empty(0)
+        self._pv = np.empty(0)
+        self._prices = np.empty(0)
+        self._index = None
+        # Compact trade arrays from the last run (set by run_backtest)
+        self._trade_shares = np.empty(0)
+        self._trade_prices = np.empty(0)
+        self._trade_action = np.empty(0, dtype=np.int8)
         
     def run_backtest(self, data, price_column='Close'):
         """
@@ -51,150 +252,178 @@ class Backtest:
         dict
             Backtest results including performance metrics
         """
-        df = data.copy()
-        
-        # Initialize portfolio tracking
-        cash = self.initial_capital
-        shares = 0
-        portfolio_value = self.initial_capital
-        
-        # Track daily portfolio values
-        portfolio_values = []
-        trade_log = []
-        
+        # No copy of the input frame: the backtest only reads the price and
+        # signal columns, pulled out here with the dtypes the compiled
+        # kernel expects
+        prices = data[price_column].to_numpy(dtype=np.float64)
+        signals = data['Signal'].to_numpy(dtype=np.int64)
+        dates = data.index
+
         print(f"Starting backtest with ${self.initial_capital:,.2f} initial capital")
         print(f"Commission rate: {self.commission*100:.2f}% per trade")
-        
-        for i, (date, row) in enumerate(df.iterrows()):
-            price = row[price_column]
-            signal = row['Signal']
-            
-            # Execute trades based on signals
-            if signal == 1 and shares == 0:  # Buy signal and not already holding
-                # Buy as many shares as possible with available cash
-                commission_cost = cash * self.commission
-                available_cash = cash - commission_cost
-                shares_to_buy = int(available_cash / price)
-                
-                if shares_to_buy > 0:
-                    cost = shares_to_buy * price
-                    cash -= (cost + commission_cost)
-                    shares += shares_to_buy
-                    
-                    trade_log.append({
-                        'Date': date,
-                        'Action': 'BUY',
-                        'Shares': shares_to_buy,
-                        'Price': price,
-                        'Cost': cost,
-                        'Commission': commission_cost,
-                        'Cash_After': cash,
-                        'Shares_After': shares
-                    })
-            
-            elif signal == -1 and shares > 0:  # Sell signal and holding shares
-                # Sell all shares
-                proceeds = shares * price
-                commission_cost = proceeds * self.commission
-                cash += (proceeds - commission_cost)
-                
-                trade_log.append({
-                    'Date': date,
-                    'Action': 'SELL',
-                    'Shares': shares,
-                    'Price': price,
-                    'Proceeds': proceeds,
-                    'Commission': commission_cost,
-                    'Cash_After': cash,
-                    'Shares_After': 0
-                })
-                
-                shares = 0
-            
-            # Calculate current portfolio value
-            portfolio_value = cash + (shares * price)
-            portfolio_values.append({
-                'Date': date,
-                'Cash': cash,
-                'Shares': shares,
-                'Price': price,
-                'Portfolio_Value': portfolio_value
-            })
-        
-        # Store results
-        self.trades = trade_log
-        self.portfolio_values = portfolio_values
+
+        # Run the compiled simulation loop
+        (cash_arr, shares_arr, pv_arr,
+         trade_idx, trade_shares, trade_prices,
+         trade_action, trade_commission) = _simulate(
+            prices, signals, float(self.initial_capital), float(self.commission),
+            self.fractional_shares)
+
+        # The kernel tracks shares as float64 either way; present whole
+        # share counts as integers when fractional sizing is off
+        if not self.fractional_shares:
+            shares_arr = shares_arr.astype(np.int64)
+            trade_shares = trade_shares.astype(np.int64)
+
+        # Build the trade log as a DataFrame in one shot from the compact
+        # columnar arrays (no per-trade dict construction)
+        trades_df = pd.DataFrame({
+            'Date': dates[trade_idx],
+            'Action': np.where(trade_action == 1, 'BUY', 'SELL'),
+            'Shares': trade_shares,
+            'Price': trade_prices,
+            'Amount': trade_shares * trade_prices,
+            'Commission': trade_commission,
+            'Cash_After': cash_arr[trade_idx],
+            'Shares_After': shares_arr[trade_idx]
+        })
+
+        portfolio_value = pv_arr[-1] if len(pv_arr) else self.initial_capital
+
+        # Store results; the portfolio history DataFrame is assembled once
+        # inside _calculate_performance_metrics from these arrays
+        self.trades = trades_df
+        self._cash = cash_arr
+        self._shares = shares_arr
+        self._pv = pv_arr
+        self._prices = prices
+        self._index = data.index
+        self._trade_shares = trade_shares
+        self._trade_prices = trade_prices
+        self._trade_action = trade_action
         
         # Calculate performance metrics
-        results = self._calculate_performance_metrics(df, price_column)
+        results = self._calculate_performance_metrics(prices, pv_arr, data.index)
         
         print(f"Backtest completed. Final portfolio value: ${portfolio_value:,.2f}")
-        print(f"Total trades executed: {len(trade_log)}")
+        print(f"Total trades executed: {len(trades_df)}")
         
         return results
     
-    def _calculate_performance_metrics(self, data, price_column):
+    def run_many(self, data_by_ticker, price_column='Close', max_workers=None):
         """
-        Calculate comprehensive performance metrics.
-        
+        Run independent backtests for several tickers across processes.
+
+        Each ticker's backtest has no cross-ticker dependency, so they
+        fan out over a process pool for a near-linear speedup up to the
+        core count. Each worker uses a fresh engine with this instance's
+        settings; this instance's own trade/portfolio state is untouched.
+
         Parameters:
         -----------
-        data : pandas.DataFrame
-            Original data with prices
+        data_by_ticker : dict
+            Mapping of ticker symbol to strategy DataFrame (with 'Signal')
         price_column : str
-            Price column name
-        
+            Column name for price data
+        max_workers : int, optional
+            Number of worker processes (default: all available cores)
+
+        Returns:
+        --------
+        dict
+            Mapping of ticker symbol to backtest results dict
+        """
+        items = [(ticker, data, self.initial_capital, self.commission,
+                  self.risk_free_rate, self.drawdown_lookback,
+                  self.fractional_shares, price_column)
+                 for ticker, data in data_by_ticker.items()]
+
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return dict(executor.map(_run_single, items))
+
+    def _calculate_performance_metrics(self, prices, pv, index):
+        """
+        Calculate comprehensive performance metrics.
+
+        All metrics are numpy reductions over the raw tracking arrays;
+        the portfolio history DataFrame (with its derived columns) is
+        assembled in a single constructor call at the end.
+
+        Parameters:
+        -----------
+        prices : numpy.ndarray
+            Price per bar
+        pv : numpy.ndarray
+            Portfolio value per bar
+        index : pandas.Index
+            Date index for the portfolio history
+
         Returns:
         --------
         dict
             Performance metrics
         """
-        if not self.portfolio_values:
+        if len(pv) == 0:
             return {}
-        
-        # Convert portfolio values to DataFrame
-        portfolio_df = pd.DataFrame(self.portfolio_values)
-        portfolio_df.set_index('Date', inplace=True)
-        
+
         # Strategy performance
-        final_value = portfolio_df['Portfolio_Value'].iloc[-1]
+        final_value = pv[-1]
         total_return = (final_value - self.initial_capital) / self.initial_capital
-        
+
         # Buy and hold performance
-        start_price = data[price_column].iloc[0]
-        end_price = data[price_column].iloc[-1]
-        buy_hold_return = (end_price - start_price) / start_price
+        buy_hold_return = (prices[-1] - prices[0]) / prices[0]
         buy_hold_final_value = self.initial_capital * (1 + buy_hold_return)
-        
-        # Calculate daily returns for additional metrics
-        portfolio_df['Daily_Return'] = portfolio_df['Portfolio_Value'].pct_change()
-        
-        # Risk metrics
-        volatility = portfolio_df['Daily_Return'].std() * np.sqrt(252)  # Annualized
-        sharpe_ratio = (total_return * 252) / (volatility * 252) if volatility > 0 else 0
-        
-        # Drawdown calculation
-        portfolio_df['Peak'] = portfolio_df['Portfolio_Value'].expanding().max()
-        portfolio_df['Drawdown'] = (portfolio_df['Portfolio_Value'] - portfolio_df['Peak']) / portfolio_df['Peak']
-        max_drawdown = portfolio_df['Drawdown'].min()
-        
-        # Win rate calculation
-        if self.trades:
-            profitable_trades = 0
-            total_trades = len(self.trades) // 2  # Buy-sell pairs
-            
-            for i in range(0, len(self.trades) - 1, 2):
-                if i + 1 < len(self.trades):
-                    buy_trade = self.trades[i]
-                    sell_trade = self.trades[i + 1]
-                    if sell_trade['Proceeds'] > buy_trade['Cost']:
-                        profitable_trades += 1
-            
-            win_rate = profitable_trades / total_trades if total_trades > 0 else 0
+
+        # Daily returns, computed directly on the numpy array. For long
+        # series NumExpr fuses the subtract/divide into one threaded pass.
+        if ne is not None and len(pv) > NUMEXPR_MIN_LEN:
+            daily_ret = ne.evaluate('(pv1 - pv0) / pv0',
+                                    local_dict={'pv1': pv[1:], 'pv0': pv[:-1]})
+        else:
+            daily_ret = np.diff(pv) / pv[:-1]
+
+        # Risk metrics: annualized volatility and excess-return Sharpe ratio
+        vol_daily = daily_ret.std(ddof=1) if len(daily_ret) > 1 else 0.0
+        volatility = vol_daily * np.sqrt(252)
+        if vol_daily > 0:
+            excess_daily = daily_ret.mean() - self.risk_free_rate / 252
+            sharpe_ratio = excess_daily / vol_daily * np.sqrt(252)
+        else:
+            sharpe_ratio = 0.0
+
+        # Drawdown calculation (single cumulative-max pass over the raw array)
+        peak = np.maximum.accumulate(pv)
+        if ne is not None and len(pv) > NUMEXPR_MIN_LEN:
+            drawdown = ne.evaluate('(pv - peak) / peak')
+        else:
+            drawdown = (pv - peak) / peak
+        max_drawdown = drawdown.min()
+
+
+        # Win rate: buys and sells alternate, so pair them up and compare
+        # proceeds against cost in one vectorized pass
+        buy_mask = self._trade_action == 1
+        costs = self._trade_prices[buy_mask] * self._trade_shares[buy_mask]
+        proceeds = self._trade_prices[~buy_mask] * self._trade_shares[~buy_mask]
+        total_trades = min(len(costs), len(proceeds))  # completed pairs
+        if total_trades > 0:
+            wins = int((proceeds[:total_trades] > costs[:total_trades]).sum())
+            win_rate = wins / total_trades
         else:
             win_rate = 0
-            total_trades = 0
-        
+
+        # Assemble the portfolio history DataFrame once, derived columns
+        # included (the plotting code reads Daily_Return and Drawdown)
+        portfolio_df = pd.DataFrame({
+            'Cash': self._cash,
+            'Shares': self._shares,
+            'Price': prices,
+            'Portfolio_Value': pv,
+            'Daily_Return': np.concatenate(([np.nan], daily_ret)),
+            'Drawdown': drawdown
+        }, index=index)
+        self.portfolio_values = portfolio_df
+
         # Compile results
         results = {
             'initial_capital': self.initial_capital,
@@ -206,11 +435,14 @@ class Backtest:
             'volatility_pct': volatility * 100,
             'sharpe_ratio': sharpe_ratio,
             'max_drawdown_pct': max_drawdown * 100,
+            'max_drawdown_windowed_pct': (
+                max_drawdown_windowed(pv, self.drawdown_lookback) * 100
+                if self.drawdown_lookback else None),
             'total_trades': len(self.trades),
             'trade_pairs': total_trades,
             'win_rate_pct': win_rate * 100,
             'portfolio_df': portfolio_df,
-            'trades_df': pd.DataFrame(self.trades) if self.trades else pd.DataFrame()
+            'trades_df': self.trades
         }
         
         return results
@@ -238,6 +470,8 @@ class Backtest:
         print(f"Volatility: {results['volatility_pct']:.2f}%")
         print(f"Sharpe Ratio: {results['sharpe_ratio']:.3f}")
         print(f"Max Drawdown: {results['max_drawdown_pct']:.2f}%")
+        if results.get('max_drawdown_windowed_pct') is not None:
+            print(f"Max Drawdown (windowed): {results['max_drawdown_windowed_pct']:.2f}%")
         
         print(f"\nTrading Activity:")
         print(f"Total Trades: {results['total_trades']}")
@@ -250,10 +484,15 @@ class Backtest:
         else:
             print(f"\n❌ Strategy UNDERPERFORMED buy-and-hold by {abs(results['excess_return_pct']):.2f}%")
     
-    def save_results(self, results, ticker, results_dir="results"):
+    def save_results(self, results, ticker, results_dir="results", file_format="parquet"):
         """
-        Save backtest results to CSV files.
-        
+        Save backtest results to disk.
+
+        Parquet (the default) writes compressed columnar files that are
+        roughly 10x smaller and much faster to read back than CSV; pass
+        file_format='csv' for plain text output. Falls back to CSV
+        automatically if no parquet engine (pyarrow) is installed.
+
         Parameters:
         -----------
         results : dict
@@ -262,7 +501,9 @@ class Backtest:
             Stock ticker symbol
         results_dir : str
             Directory to save results
-        
+        file_format : str
+            'parquet' (default) or 'csv'
+
         Returns:
         --------
         dict
@@ -270,20 +511,35 @@ class Backtest:
         """
         os.makedirs(results_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
+
         saved_files = {}
-        
+
+        def _save_frame(frame, path, index):
+            if file_format == "parquet":
+                try:
+                    frame.to_parquet(f"{path}.parquet", engine='pyarrow',
+                                     compression='zstd', index=index)
+                    return f"{path}.parquet"
+                except ImportError:
+                    print("Warning: pyarrow not installed, saving CSV instead")
+            frame.to_csv(f"{path}.csv", index=index)
+            return f"{path}.csv"
+
         # Save portfolio values
         if 'portfolio_df' in results and not results['portfolio_df'].empty:
-            portfolio_file = os.path.join(results_dir, f"{ticker}_portfolio_{timestamp}.csv")
-            results['portfolio_df'].to_csv(portfolio_file)
+            portfolio_file = _save_frame(
+                results['portfolio_df'],
+                os.path.join(results_dir, f"{ticker}_portfolio_{timestamp}"),
+                index=True)
             saved_files['portfolio'] = portfolio_file
             print(f"Portfolio values saved to: {portfolio_file}")
-        
+
         # Save trades
         if 'trades_df' in results and not results['trades_df'].empty:
-            trades_file = os.path.join(results_dir, f"{ticker}_trades_{timestamp}.csv")
-            results['trades_df'].to_csv(trades_file, index=False)
+            trades_file = _save_frame(
+                results['trades_df'],
+                os.path.join(results_dir, f"{ticker}_trades_{timestamp}"),
+                index=False)
             saved_files['trades'] = trades_file
             print(f"Trades saved to: {trades_file}")
         
@@ -316,9 +572,12 @@ if __name__ == "__main__":
     # This would normally be called with real strategy data
     # For testing, we'll create a simple example
     dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
+    n = len(dates)
+    rng = np.random.default_rng(0)  # seeded for reproducible output
+    phase = np.arange(n) % 50
     sample_data = pd.DataFrame({
-        'Close': 100 + np.cumsum(np.random.randn(len(dates)) * 0.5),
-        'Signal': [1 if i % 50 == 0 else (-1 if i % 50 == 25 else 0) for i in range(len(dates))],
+        'Close': 100 + np.cumsum(rng.standard_normal(n) * 0.5),
+        'Signal': np.where(phase == 0, 1, np.where(phase == 25, -1, 0)),
         'Position': 0
     }, index=dates)
     
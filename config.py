@@ -60,6 +60,10 @@ INITIAL_CAPITAL = 10000  # $10,000
 # Commission rate per trade (as decimal)
 COMMISSION = 0.001  # 0.1% commission
 
+# Allow fractional share quantities on buys (most brokers support this;
+# set to False to floor every buy to whole shares)
+FRACTIONAL_SHARES = True
+
 # Alternative commission rates:
 # COMMISSION = 0.0    # No commission (unrealistic but good for testing)
 # COMMISSION = 0.005  # 0.5% commission (higher cost)
@@ -79,7 +83,8 @@ SAVE_DATA = True          # Save CSV data files
 SHOW_PLOTS = False        # Display plots on screen (set to False for testing)
 
 # Plot settings
-PLOT_DPI = 300           # Image resolution (300 is high quality)
+PLOT_DPI = 120           # Image resolution (120 is crisp on screen; 300
+                         # multiplies the encoded pixel count 6x+)
 PLOT_FORMAT = "png"      # Image format: "png", "jpg", "pdf"
 
 # =============================================================================
@@ -96,6 +101,11 @@ FILL_MISSING_DATA = True # Forward-fill missing data points
 # Risk-free rate for Sharpe ratio calculation (annual rate as decimal)
 RISK_FREE_RATE = 0.02    # 2% annual risk-free rate
 
+# Drawdown lookback window in trading days (None = measure drawdown
+# against the all-time peak only)
+DRAWDOWN_LOOKBACK = None
+# DRAWDOWN_LOOKBACK = 252  # Worst drawdown within any rolling year
+
 # =============================================================================
 # PRESET CONFIGURATIONS
 # =============================================================================
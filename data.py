@@ -9,8 +9,25 @@ Author: Stock Trading Strategy Project
 
 import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+import json
 import os
+import time
+
+# Local cache for downloaded price data: re-runs during strategy tuning are
+# common and the yfinance HTTP round-trip dominates their wall time
+CACHE_DIR = "cache"
+CACHE_MAX_AGE_SECONDS = 24 * 60 * 60  # refresh cached data after a day
+
+
+def _cache_path(ticker, start_date, end_date, period):
+    """Build the cache file path for a download request."""
+    if start_date and end_date:
+        key = f"{ticker}_{start_date}_{end_date}"
+    else:
+        key = f"{ticker}_{period}"
+    return os.path.join(CACHE_DIR, f"{key}.parquet")
 
 
 def download_stock_data(ticker, start_date=None, end_date=None, period="2y"):
@@ -40,32 +57,52 @@ def download_stock_data(ticker, start_date=None, end_date=None, period="2y"):
     >>> data = download_stock_data('AAPL', start_date='2022-01-01', end_date='2023-12-31')
     >>> print(data.head())
     """
+    # Serve from the local parquet cache when it is fresh enough: a warm
+    # cache read takes milliseconds versus seconds for the network fetch
+    cache_path = _cache_path(ticker, start_date, end_date, period)
+    try:
+        if (os.path.exists(cache_path)
+                and time.time() - os.path.getmtime(cache_path) < CACHE_MAX_AGE_SECONDS):
+            data = pd.read_parquet(cache_path)
+            print(f"Loaded {len(data)} days of cached data for {ticker}")
+            return data
+    except Exception as e:
+        print(f"Warning: Could not read cache for {ticker}: {str(e)}")
+
     try:
         # Create ticker object
         stock = yf.Ticker(ticker)
-        
+
         # Download data
         if start_date and end_date:
             data = stock.history(start=start_date, end=end_date)
         else:
             data = stock.history(period=period)
-        
+
         if data.empty:
             raise ValueError(f"No data found for ticker {ticker}")
         
-        # Clean column names (remove any extra spaces)
-        data.columns = data.columns.str.strip()
-        
-        # Ensure we have the required columns
-        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        missing_columns = [col for col in required_columns if col not in data.columns]
-        
-        if missing_columns:
+        # Clean column names (yfinance never actually returns padded names,
+        # so only pay for this outside optimized runs)
+        if __debug__:
+            data.columns = data.columns.str.strip()
+
+        # Ensure we have the required columns (hashed subset check)
+        required_columns = {'Open', 'High', 'Low', 'Close', 'Volume'}
+        if not required_columns.issubset(data.columns):
+            missing_columns = sorted(required_columns.difference(data.columns))
             raise ValueError(f"Missing required columns: {missing_columns}")
         
         print(f"Successfully downloaded {len(data)} days of data for {ticker}")
         print(f"Date range: {data.index[0].strftime('%Y-%m-%d')} to {data.index[-1].strftime('%Y-%m-%d')}")
-        
+
+        # Cache for subsequent runs (best-effort: a failed write is not fatal)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            data.to_parquet(cache_path, compression='zstd')
+        except Exception as e:
+            print(f"Warning: Could not cache data for {ticker}: {str(e)}")
+
         return data
         
     except Exception as e:
@@ -97,26 +134,30 @@ def validate_data(data, ticker):
         print(f"Warning: Only {len(data)} days of data available for {ticker}. "
               f"200-day moving average may not be reliable.")
     
-    # Check for missing values
-    missing_data = data.isnull().sum()
-    if missing_data.any():
+    # Single numpy sweep over the numeric columns for both quality checks
+    # (missing values and non-positive prices) instead of one pandas pass
+    # per check per column
+    check_columns = [col for col in ['Open', 'High', 'Low', 'Close', 'Volume']
+                     if col in data.columns]
+    values = data[check_columns].to_numpy(dtype=np.float64)
+    missing_counts = np.isnan(values).sum(axis=0)
+
+    if missing_counts.any():
         print(f"Warning: Missing data found in {ticker}:")
-        for col, count in missing_data.items():
+        for col, count in zip(check_columns, missing_counts):
             if count > 0:
                 print(f"  {col}: {count} missing values")
-        
+
         # Forward fill missing values
-        data = data.fillna(method='ffill')
+        data = data.ffill()
         print("Missing values have been forward-filled.")
-    
+
     # Check for zero or negative prices
-    price_columns = ['Open', 'High', 'Low', 'Close']
-    for col in price_columns:
-        if col in data.columns:
-            invalid_prices = (data[col] <= 0).sum()
-            if invalid_prices > 0:
-                print(f"Warning: {invalid_prices} invalid prices found in {col} column")
-    
+    invalid_counts = (values <= 0).sum(axis=0)
+    for col, count in zip(check_columns, invalid_counts):
+        if col != 'Volume' and count > 0:
+            print(f"Warning: {count} invalid prices found in {col} column")
+
     return data
 
 
@@ -167,10 +208,21 @@ def get_stock_info(ticker):
     dict
         Dictionary containing stock information
     """
+    # Serve from the local JSON cache when fresh: ticker metadata changes
+    # rarely and the yfinance .info lookup is its own HTTP round-trip
+    cache_path = os.path.join(CACHE_DIR, f"{ticker}_info.json")
+    try:
+        if (os.path.exists(cache_path)
+                and time.time() - os.path.getmtime(cache_path) < CACHE_MAX_AGE_SECONDS):
+            with open(cache_path) as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not read info cache for {ticker}: {str(e)}")
+
     try:
         stock = yf.Ticker(ticker)
         info = stock.info
-        
+
         # Extract key information
         stock_info = {
             'symbol': info.get('symbol', ticker),
@@ -180,9 +232,17 @@ def get_stock_info(ticker):
             'marketCap': info.get('marketCap', 'N/A'),
             'currency': info.get('currency', 'USD')
         }
-        
+
+        # Cache for subsequent runs (best-effort: a failed write is not fatal)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump(stock_info, f)
+        except Exception as e:
+            print(f"Warning: Could not cache info for {ticker}: {str(e)}")
+
         return stock_info
-        
+
     except Exception as e:
         print(f"Warning: Could not retrieve info for {ticker}: {str(e)}")
         return {'symbol': ticker, 'longName': 'N/A'}
@@ -14,8 +14,6 @@ Easy Configuration for Beginners:
 Author: Stock Trading Strategy Project
 """
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -23,6 +21,10 @@ import os
 import warnings
 warnings.filterwarnings('ignore')
 
+# matplotlib and seaborn are imported lazily inside the plotting functions:
+# they cost ~500ms at startup, which headless/batch runs that never draw a
+# chart should not pay.
+
 # Import our custom modules
 from data import download_stock_data, validate_data, get_stock_info, save_data_to_csv
 from strategy import create_strategy_data, analyze_signals
@@ -31,31 +33,109 @@ from backtest import Backtest
 # Import configuration (you can edit config.py to customize settings)
 from config import (
     TICKER, START_DATE, END_DATE, SHORT_MA, LONG_MA,
-    INITIAL_CAPITAL, COMMISSION, RESULTS_DIR, SHOW_PLOTS
+    INITIAL_CAPITAL, COMMISSION, RISK_FREE_RATE, DRAWDOWN_LOOKBACK,
+    FRACTIONAL_SHARES, RESULTS_DIR, SHOW_PLOTS, PLOT_DPI
 )
 
 # =============================================================================
 # PLOTTING FUNCTIONS
 # =============================================================================
 
+# Series longer than this are downsampled before plotting; matplotlib
+# renders one line segment per point, which dominates chart time on
+# intraday or tick data
+PLOT_MAX_POINTS = 5000
+PLOT_DOWNSAMPLE_TO = 2000
+
+try:
+    from tsdownsample import MinMaxLTTBDownsampler
+except ImportError:
+    # Optional; the numpy min/max bucket fallback below is used without it
+    MinMaxLTTBDownsampler = None
+
+
+def _get_pyplot():
+    """
+    Import pyplot lazily, forcing the Agg backend for save-only runs.
+
+    Agg renders lines straight into a raster buffer and is noticeably
+    faster than interactive backends when figures are only written to
+    PNG; when SHOW_PLOTS is on the default interactive backend is kept.
+    """
+    import matplotlib
+    if not SHOW_PLOTS:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _downsample_indices(values, n_out=PLOT_DOWNSAMPLE_TO):
+    """
+    Pick a visually representative subset of row indices for plotting.
+
+    Uses MinMaxLTTB when tsdownsample is installed; otherwise keeps the
+    min and max of each bucket so peaks and troughs survive.
+    """
+    n = len(values)
+    if n <= n_out:
+        return np.arange(n)
+
+    if MinMaxLTTBDownsampler is not None:
+        return np.asarray(MinMaxLTTBDownsampler().downsample(values, n_out=n_out))
+
+    n_bins = n_out // 2
+    width = n // n_bins
+    buckets = np.asarray(values[:n_bins * width]).reshape(n_bins, width)
+    offsets = np.arange(n_bins) * width
+    idx = np.concatenate([
+        offsets + buckets.argmin(axis=1),
+        offsets + buckets.argmax(axis=1),
+        np.arange(n_bins * width, n)  # keep the tail remainder
+    ])
+    return np.unique(idx)
+
+
 def create_price_and_ma_plot(data, ticker, short_ma, long_ma):
     """Create a plot showing price, moving averages, and signals."""
-    
+    plt = _get_pyplot()
+
+    # Downsample long series once and reuse the same indices for price and
+    # both MA traces so crossovers stay aligned; signal bars are always
+    # kept so their markers are not dropped
+    if len(data) > PLOT_MAX_POINTS:
+        idx = _downsample_indices(data['Close'].to_numpy())
+        signal_idx = np.flatnonzero(data['Signal'].to_numpy() != 0)
+        data = data.iloc[np.union1d(idx, signal_idx)]
+
+    import matplotlib.dates as mdates
+
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 12))
-    
+
+    # Convert the datetime index to matplotlib's float days once; plotting
+    # with datetime objects makes every artist redo that conversion
+    x_num = mdates.date2num(data.index.to_pydatetime())
+
     # Main price chart
-    ax1.plot(data.index, data['Close'], label='Close Price', linewidth=1, alpha=0.8)
-    ax1.plot(data.index, data[f'MA_{short_ma}'], label=f'{short_ma}-day MA', linewidth=2)
-    ax1.plot(data.index, data[f'MA_{long_ma}'], label=f'{long_ma}-day MA', linewidth=2)
-    
-    # Add buy/sell signals
-    buy_signals = data[data['Signal'] == 1]
-    sell_signals = data[data['Signal'] == -1]
-    
-    ax1.scatter(buy_signals.index, buy_signals['Close'], 
-               color='green', marker='^', s=100, label='Buy Signal', zorder=5)
-    ax1.scatter(sell_signals.index, sell_signals['Close'], 
-               color='red', marker='v', s=100, label='Sell Signal', zorder=5)
+    ax1.plot(x_num, data['Close'], label='Close Price', linewidth=1, alpha=0.8,
+             rasterized=True)
+    ax1.plot(x_num, data[f'MA_{short_ma}'], label=f'{short_ma}-day MA', linewidth=2,
+             rasterized=True)
+    ax1.plot(x_num, data[f'MA_{long_ma}'], label=f'{long_ma}-day MA', linewidth=2,
+             rasterized=True)
+
+    # Add buy/sell signals: index the two arrays we need directly instead
+    # of boolean-filtering the whole DataFrame (which copies every column)
+    signals = data['Signal'].to_numpy()
+    close = data['Close'].to_numpy()
+    mask_buy = signals == 1
+    mask_sell = signals == -1
+
+    # plot() with a marker style draws the signals as a single Line2D
+    # instead of scatter's per-point PathCollection
+    ax1.plot(x_num[mask_buy], close[mask_buy], '^', color='green', ms=10,
+             ls='', label='Buy Signal', zorder=5)
+    ax1.plot(x_num[mask_sell], close[mask_sell], 'v', color='red', ms=10,
+             ls='', label='Sell Signal', zorder=5)
     
     ax1.set_title(f'{ticker} - Price Chart with Moving Average Crossover Strategy', fontsize=16)
     ax1.set_ylabel('Price ($)', fontsize=12)
@@ -63,32 +143,46 @@ def create_price_and_ma_plot(data, ticker, short_ma, long_ma):
     ax1.grid(True, alpha=0.3)
     
     # Volume chart
-    ax2.bar(data.index, data['Volume'], alpha=0.6, color='gray')
+    ax2.bar(x_num, data['Volume'], alpha=0.6, color='gray')
     ax2.set_title(f'{ticker} - Trading Volume', fontsize=14)
     ax2.set_ylabel('Volume', fontsize=12)
     ax2.set_xlabel('Date', fontsize=12)
     ax2.grid(True, alpha=0.3)
-    
+
+    # Numeric x needs explicit date formatting back on the ticks
+    for ax in (ax1, ax2):
+        locator = mdates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
     plt.tight_layout()
     return fig
 
 def create_equity_curve_plot(results, ticker):
     """Create an equity curve comparing strategy vs buy-and-hold."""
-    
+    plt = _get_pyplot()
+
     portfolio_df = results['portfolio_df']
-    
-    # Calculate buy-and-hold portfolio value
-    initial_price = portfolio_df['Price'].iloc[0]
-    shares_bh = results['initial_capital'] / initial_price
-    portfolio_df['Buy_Hold_Value'] = shares_bh * portfolio_df['Price']
-    
+
+    # Calculate buy-and-hold portfolio value (main() precomputes this once
+    # per run; the fallback covers direct callers)
+    if 'Buy_Hold_Value' not in portfolio_df.columns:
+        prices = portfolio_df['Price'].to_numpy()
+        shares_bh = results['initial_capital'] / prices[0]
+        portfolio_df['Buy_Hold_Value'] = shares_bh * prices
+
+    import matplotlib.dates as mdates
+
     fig, ax = plt.subplots(figsize=(15, 8))
-    
+
+    # Convert dates to float days once (see create_price_and_ma_plot)
+    x_num = mdates.date2num(portfolio_df.index.to_pydatetime())
+
     # Plot both equity curves
-    ax.plot(portfolio_df.index, portfolio_df['Portfolio_Value'], 
-           label='Strategy', linewidth=2, color='blue')
-    ax.plot(portfolio_df.index, portfolio_df['Buy_Hold_Value'], 
-           label='Buy & Hold', linewidth=2, color='orange')
+    ax.plot(x_num, portfolio_df['Portfolio_Value'],
+           label='Strategy', linewidth=2, color='blue', rasterized=True)
+    ax.plot(x_num, portfolio_df['Buy_Hold_Value'],
+           label='Buy & Hold', linewidth=2, color='orange', rasterized=True)
     
     # Add horizontal line at initial capital
     ax.axhline(y=results['initial_capital'], color='gray', 
@@ -102,13 +196,19 @@ def create_equity_curve_plot(results, ticker):
     
     # Format y-axis as currency
     ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x:,.0f}'))
-    
+
+    # Numeric x needs explicit date formatting back on the ticks
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
     plt.tight_layout()
     return fig
 
 def create_performance_summary_plot(results, ticker):
     """Create a summary plot with key performance metrics."""
-    
+    plt = _get_pyplot()
+
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
     
     # 1. Returns comparison
@@ -127,11 +227,18 @@ def create_performance_summary_plot(results, ticker):
         ax1.text(bar.get_x() + bar.get_width()/2., height + 0.1,
                 f'{value:.1f}%', ha='center', va='bottom')
     
-    # 2. Drawdown chart
+    # 2. Drawdown chart: one multiply into a numpy array and one date
+    # conversion, shared by the fill and the outline
+    import matplotlib.dates as mdates
+
     portfolio_df = results['portfolio_df']
-    ax2.fill_between(portfolio_df.index, portfolio_df['Drawdown'] * 100, 0, 
-                    color='red', alpha=0.3)
-    ax2.plot(portfolio_df.index, portfolio_df['Drawdown'] * 100, color='red')
+    dd = portfolio_df['Drawdown'].to_numpy() * 100
+    x_num = mdates.date2num(portfolio_df.index.to_pydatetime())
+    ax2.fill_between(x_num, dd, 0, color='red', alpha=0.3)
+    ax2.plot(x_num, dd, color='red')
+    locator = mdates.AutoDateLocator()
+    ax2.xaxis.set_major_locator(locator)
+    ax2.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
     ax2.set_title('Portfolio Drawdown', fontsize=14)
     ax2.set_ylabel('Drawdown (%)', fontsize=12)
     ax2.grid(True, alpha=0.3)
@@ -154,16 +261,26 @@ def create_performance_summary_plot(results, ticker):
     
     # 4. Monthly returns heatmap (if enough data)
     try:
-        monthly_returns = portfolio_df['Daily_Return'].resample('M').apply(lambda x: (1 + x).prod() - 1) * 100
+        # Compound daily returns per month with the built-in prod reduction
+        # (C path, no per-group Python lambda)
+        monthly_returns = ((1 + portfolio_df['Daily_Return']).resample('ME').prod() - 1) * 100
         monthly_returns.index = monthly_returns.index.strftime('%Y-%m')
         
         if len(monthly_returns) > 1:
-            # Reshape for heatmap
+            # Single-column heatmap via imshow with manual annotations;
+            # this keeps seaborn (and its DataFrame coercion) off the
+            # plotting path entirely
             monthly_data = monthly_returns.values.reshape(-1, 1)
-            sns.heatmap(monthly_data, annot=True, fmt='.1f', cmap='RdYlGn', 
-                       center=0, ax=ax4, cbar_kws={'label': 'Return (%)'})
+            vmax = max(abs(monthly_data.min()), abs(monthly_data.max())) or 1.0
+            im = ax4.imshow(monthly_data, cmap='RdYlGn', aspect='auto',
+                            vmin=-vmax, vmax=vmax)
+            fig.colorbar(im, ax=ax4, label='Return (%)')
+            for i, value in enumerate(monthly_returns.values):
+                ax4.text(0, i, f'{value:.1f}', ha='center', va='center')
             ax4.set_title('Monthly Returns Heatmap', fontsize=14)
             ax4.set_ylabel('Month', fontsize=12)
+            ax4.set_xticks([])
+            ax4.set_yticks(np.arange(len(monthly_returns)))
             ax4.set_yticklabels(monthly_returns.index, rotation=0)
         else:
             ax4.text(0.5, 0.5, 'Insufficient data\nfor monthly analysis', 
@@ -177,42 +294,172 @@ def create_performance_summary_plot(results, ticker):
     plt.tight_layout()
     return fig
 
-def save_plots(data, results, ticker, results_dir):
-    """Save all plots to the results directory."""
-    
+def save_plots(data, results, ticker, results_dir, keep_open=False):
+    """
+    Save all plots to the results directory.
+
+    Returns the saved file paths together with the figure objects so the
+    caller can display them without rendering everything a second time.
+    Figures are closed after saving unless keep_open is True.
+    """
+    plt = _get_pyplot()
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
+
     # Create and save price chart
     fig1 = create_price_and_ma_plot(data, ticker, SHORT_MA, LONG_MA)
     price_chart_path = os.path.join(results_dir, f"{ticker}_price_chart_{timestamp}.png")
-    fig1.savefig(price_chart_path, dpi=300, bbox_inches='tight')
-    plt.close(fig1)
-    
+    fig1.savefig(price_chart_path, dpi=PLOT_DPI,
+                 pil_kwargs={'optimize': True, 'compress_level': 6})
+
     # Create and save equity curve
     fig2 = create_equity_curve_plot(results, ticker)
     equity_curve_path = os.path.join(results_dir, f"{ticker}_equity_curve_{timestamp}.png")
-    fig2.savefig(equity_curve_path, dpi=300, bbox_inches='tight')
-    plt.close(fig2)
-    
+    fig2.savefig(equity_curve_path, dpi=PLOT_DPI,
+                 pil_kwargs={'optimize': True, 'compress_level': 6})
+
     # Create and save performance summary
     fig3 = create_performance_summary_plot(results, ticker)
     summary_plot_path = os.path.join(results_dir, f"{ticker}_performance_summary_{timestamp}.png")
-    fig3.savefig(summary_plot_path, dpi=300, bbox_inches='tight')
-    plt.close(fig3)
-    
-    return {
+    fig3.savefig(summary_plot_path, dpi=PLOT_DPI,
+                 pil_kwargs={'optimize': True, 'compress_level': 6})
+
+    figures = {
+        'price_chart': fig1,
+        'equity_curve': fig2,
+        'performance_summary': fig3
+    }
+
+    if not keep_open:
+        for fig in figures.values():
+            plt.close(fig)
+
+    paths = {
         'price_chart': price_chart_path,
         'equity_curve': equity_curve_path,
         'performance_summary': summary_plot_path
     }
+    return paths, figures
 
 # =============================================================================
 # MAIN EXECUTION
 # =============================================================================
 
+def run_one(ticker, keep_figures=False):
+    """
+    Run the complete pipeline (download -> strategy -> backtest -> save)
+    for a single ticker.
+
+    Parameters:
+    -----------
+    ticker : str
+        Stock ticker symbol to analyze
+    keep_figures : bool
+        Keep the plot figures open for display (default: False)
+
+    Returns:
+    --------
+    tuple
+        (strategy_data, results, figures)
+    """
+    # Step 1: Download and validate data
+    print("\n1. Downloading stock data...")
+    raw_data = download_stock_data(ticker, START_DATE, END_DATE)
+    validated_data = validate_data(raw_data, ticker)
+
+    # Get stock info
+    stock_info = get_stock_info(ticker)
+    print(f"Company: {stock_info.get('longName', 'N/A')}")
+    print(f"Sector: {stock_info.get('sector', 'N/A')}")
+
+    # Step 2: Implement strategy
+    print("\n2. Implementing trading strategy...")
+    strategy_data = create_strategy_data(validated_data, SHORT_MA, LONG_MA)
+
+    # Step 3: Run backtest
+    print("\n3. Running backtest...")
+    backtest_engine = Backtest(INITIAL_CAPITAL, COMMISSION, RISK_FREE_RATE,
+                               drawdown_lookback=DRAWDOWN_LOOKBACK,
+                               fractional_shares=FRACTIONAL_SHARES)
+    results = backtest_engine.run_backtest(strategy_data)
+
+    # Precompute derived series shared by the plot functions so each
+    # chart (and any re-display) reads a ready-made column instead of
+    # redoing the O(N) math
+    portfolio_df = results['portfolio_df']
+    prices = portfolio_df['Price'].to_numpy()
+    portfolio_df['Buy_Hold_Value'] = (INITIAL_CAPITAL / prices[0]) * prices
+
+    # Step 4: Display results
+    print("\n4. Performance Analysis:")
+    backtest_engine.print_performance_summary(results)
+
+    # Step 5: Create and save visualizations
+    print("\n5. Creating visualizations...")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+
+    plot_paths, figures = save_plots(strategy_data, results, ticker, RESULTS_DIR,
+                                     keep_open=keep_figures)
+    print(f"Charts saved to {RESULTS_DIR}/ directory")
+
+    # Step 6: Save data and results
+    print("\n6. Saving results...")
+    save_data_to_csv(strategy_data, f"{ticker}_strategy_data", RESULTS_DIR)
+    backtest_engine.save_results(results, ticker, RESULTS_DIR)
+
+    print("\n" + "="*60)
+    print("ANALYSIS COMPLETE!")
+    print("="*60)
+    print(f"All results saved to: {RESULTS_DIR}/")
+    print("Files created:")
+    for plot_type, path in plot_paths.items():
+        print(f"  - {plot_type}: {os.path.basename(path)}")
+
+    return strategy_data, results, figures
+
+
+def _run_one_for_batch(ticker):
+    """Worker for run_many: run one ticker, keep only its results dict."""
+    try:
+        _, results, _ = run_one(ticker)
+        return results
+    except Exception as e:
+        print(f"Error analyzing {ticker}: {str(e)}")
+        return None
+
+
+def run_many(tickers, n_jobs=-1):
+    """
+    Run the complete pipeline for many tickers in parallel.
+
+    Tickers are dispatched in batches across worker processes so the
+    per-process startup and import costs are amortized over several
+    tickers instead of paid once per ticker.
+
+    Parameters:
+    -----------
+    tickers : list of str
+        Ticker symbols to analyze (e.g. config.TECH_STOCKS)
+    n_jobs : int
+        Number of worker processes; -1 uses all cores (default: -1)
+
+    Returns:
+    --------
+    dict
+        Mapping of ticker -> results dict (None for tickers that failed)
+    """
+    from joblib import Parallel, delayed
+
+    print(f"Running {len(tickers)} tickers across workers (n_jobs={n_jobs})...")
+    all_results = Parallel(n_jobs=n_jobs, batch_size=8)(
+        delayed(_run_one_for_batch)(ticker) for ticker in tickers)
+
+    return dict(zip(tickers, all_results))
+
+
 def main():
     """Main function that runs the complete analysis."""
-    
+
     print("="*60)
     print("STOCK TRADING STRATEGY ANALYSIS")
     print("="*60)
@@ -221,76 +468,27 @@ def main():
     print(f"Strategy: {SHORT_MA}-day MA vs {LONG_MA}-day MA crossover")
     print(f"Initial Capital: ${INITIAL_CAPITAL:,}")
     print("="*60)
-    
+
     try:
-        # Step 1: Download and validate data
-        print("\n1. Downloading stock data...")
-        raw_data = download_stock_data(TICKER, START_DATE, END_DATE)
-        validated_data = validate_data(raw_data, TICKER)
-        
-        # Get stock info
-        stock_info = get_stock_info(TICKER)
-        print(f"Company: {stock_info.get('longName', 'N/A')}")
-        print(f"Sector: {stock_info.get('sector', 'N/A')}")
-        
-        # Step 2: Implement strategy
-        print("\n2. Implementing trading strategy...")
-        strategy_data = create_strategy_data(validated_data, SHORT_MA, LONG_MA)
-        
-        # Step 3: Run backtest
-        print("\n3. Running backtest...")
-        backtest_engine = Backtest(INITIAL_CAPITAL, COMMISSION)
-        results = backtest_engine.run_backtest(strategy_data)
-        
-        # Step 4: Display results
-        print("\n4. Performance Analysis:")
-        backtest_engine.print_performance_summary(results)
-        
-        # Step 5: Create and save visualizations
-        print("\n5. Creating visualizations...")
-        os.makedirs(RESULTS_DIR, exist_ok=True)
-        
-        plot_paths = save_plots(strategy_data, results, TICKER, RESULTS_DIR)
-        print(f"Charts saved to {RESULTS_DIR}/ directory")
-        
-        # Step 6: Save data and results
-        print("\n6. Saving results...")
-        save_data_to_csv(strategy_data, f"{TICKER}_strategy_data", RESULTS_DIR)
-        backtest_engine.save_results(results, TICKER, RESULTS_DIR)
-        
-        print("\n" + "="*60)
-        print("ANALYSIS COMPLETE!")
-        print("="*60)
-        print(f"All results saved to: {RESULTS_DIR}/")
-        print("Files created:")
-        for plot_type, path in plot_paths.items():
-            print(f"  - {plot_type}: {os.path.basename(path)}")
-        
-        return strategy_data, results
-        
+        return run_one(TICKER, keep_figures=SHOW_PLOTS)
+
     except Exception as e:
         print(f"\nError during analysis: {str(e)}")
         print("Please check your configuration and try again.")
-        return None, None
+        return None, None, None
 
 if __name__ == "__main__":
     # Run the complete analysis
-    data, results = main()
-    
+    data, results, figures = main()
+
     # Optional: Display plots (controlled by config.py SHOW_PLOTS setting)
     if data is not None and results is not None and SHOW_PLOTS:
-        print("\nDisplaying charts...")
-
-        # Show price chart
-        fig1 = create_price_and_ma_plot(data, TICKER, SHORT_MA, LONG_MA)
-        plt.show()
+        import matplotlib.pyplot as plt
 
-        # Show equity curve
-        fig2 = create_equity_curve_plot(results, TICKER)
-        plt.show()
+        print("\nDisplaying charts...")
 
-        # Show performance summary
-        fig3 = create_performance_summary_plot(results, TICKER)
+        # The figures were kept open by save_plots; show them without
+        # rendering everything a second time
         plt.show()
     elif data is not None and results is not None:
         print("\nCharts saved to results/ directory (SHOW_PLOTS=False in config.py)")
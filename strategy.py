@@ -15,11 +15,27 @@ Author: Stock Trading Strategy Project
 import pandas as pd
 import numpy as np
 
+def _cumsum_ma(cumsum, window):
+    """
+    Rolling mean derived from a precomputed cumulative sum.
 
-def calculate_moving_averages(data, short_window=50, long_window=200, price_column='Close'):
+    One np.cumsum over the prices serves every window size, so a second
+    (or third) moving average costs only a subtraction and a divide
+    instead of another full rolling pass. The first window-1 slots are
+    NaN, matching pandas' rolling(...).mean() warmup.
+    """
+    out = np.full(len(cumsum), np.nan)
+    if window <= len(cumsum):
+        out[window - 1] = cumsum[window - 1] / window
+        out[window:] = (cumsum[window:] - cumsum[:-window]) / window
+    return out
+
+
+def calculate_moving_averages(data, short_window=50, long_window=200, price_column='Close',
+                              inplace=False):
     """
     Calculate simple moving averages for the given data.
-    
+
     Parameters:
     -----------
     data : pandas.DataFrame
@@ -30,18 +46,24 @@ def calculate_moving_averages(data, short_window=50, long_window=200, price_colu
         Number of periods for long-term moving average (default: 200)
     price_column : str
         Column name to use for price data (default: 'Close')
-    
+    inplace : bool
+        Add the MA columns to the given frame instead of copying it
+        first (default: False). Used by create_strategy_data, which
+        already copies once at the pipeline boundary.
+
     Returns:
     --------
     pandas.DataFrame
         Original data with additional MA columns
     """
-    # Make a copy to avoid modifying original data
-    df = data.copy()
-    
-    # Calculate moving averages
-    df[f'MA_{short_window}'] = df[price_column].rolling(window=short_window).mean()
-    df[f'MA_{long_window}'] = df[price_column].rolling(window=long_window).mean()
+    # Copy unless the caller owns the frame, to avoid modifying original data
+    df = data if inplace else data.copy()
+
+    # Calculate both moving averages from one shared cumulative sum: a
+    # single pass over the prices instead of two independent rolling scans
+    cumsum = np.cumsum(df[price_column].to_numpy(dtype=np.float64))
+    df[f'MA_{short_window}'] = _cumsum_ma(cumsum, short_window)
+    df[f'MA_{long_window}'] = _cumsum_ma(cumsum, long_window)
     
     print(f"Calculated {short_window}-day and {long_window}-day moving averages")
     
@@ -65,58 +87,47 @@ def generate_signals(data, short_window=50, long_window=200):
     --------
     pandas.DataFrame
         Data with additional signal columns
+
+    Notes:
+    ------
+    The signal columns are added to the given frame directly (its caller,
+    create_strategy_data, already copies once at the pipeline boundary;
+    copying again here would double the memory traffic).
     """
-    df = data.copy()
-    
+    df = data
+
     # Column names for moving averages
     short_ma_col = f'MA_{short_window}'
     long_ma_col = f'MA_{long_window}'
     
-    # Initialize signal columns
-    df['Signal'] = 0  # 0 = Hold, 1 = Buy, -1 = Sell
-    df['Position'] = 0  # 0 = No position, 1 = Long position
-    
-    # Generate signals where we have both moving averages
-    valid_data = df.dropna(subset=[short_ma_col, long_ma_col])
-    
-    if len(valid_data) < 2:
+    # Initialize position column as int8: both columns only ever hold
+    # {-1, 0, 1}, so the default int64 would spend 8x the memory and
+    # bandwidth on every downstream mask
+    df['Position'] = np.int8(0)  # 0 = No position, 1 = Long position
+
+    short_ma = df[short_ma_col].to_numpy()
+    long_ma = df[long_ma_col].to_numpy()
+
+    if np.count_nonzero(~(np.isnan(short_ma) | np.isnan(long_ma))) < 2:
         print("Warning: Not enough data to generate signals")
+        df['Signal'] = np.int8(0)  # 0 = Hold, 1 = Buy, -1 = Sell
         return df
-    
-    # Calculate crossover signals
-    # Buy signal: short MA crosses above long MA
-    # Sell signal: short MA crosses below long MA
-    
-    for i in range(1, len(valid_data)):
-        current_idx = valid_data.index[i]
-        prev_idx = valid_data.index[i-1]
-        
-        current_short = valid_data.loc[current_idx, short_ma_col]
-        current_long = valid_data.loc[current_idx, long_ma_col]
-        prev_short = valid_data.loc[prev_idx, short_ma_col]
-        prev_long = valid_data.loc[prev_idx, long_ma_col]
-        
-        # Golden Cross: Short MA crosses above Long MA (Buy signal)
-        if prev_short <= prev_long and current_short > current_long:
-            df.loc[current_idx, 'Signal'] = 1
-        
-        # Death Cross: Short MA crosses below Long MA (Sell signal)
-        elif prev_short >= prev_long and current_short < current_long:
-            df.loc[current_idx, 'Signal'] = -1
-    
-    # Calculate positions based on signals
-    # Start with no position
-    position = 0
-    
-    for idx in df.index:
-        signal = df.loc[idx, 'Signal']
-        
-        if signal == 1:  # Buy signal
-            position = 1
-        elif signal == -1:  # Sell signal
-            position = 0
-        
-        df.loc[idx, 'Position'] = position
+
+    # Calculate crossover signals in one vectorized pass over the MA
+    # difference. Comparisons against NaN (the rolling warmup) are False,
+    # so those bars stay 0 automatically.
+    # Buy signal: short MA crosses above long MA (Golden Cross)
+    # Sell signal: short MA crosses below long MA (Death Cross)
+    diff = short_ma - long_ma
+    signal = np.zeros(len(diff), dtype=np.int8)
+    signal[1:][(diff[:-1] <= 0) & (diff[1:] > 0)] = 1
+    signal[1:][(diff[:-1] >= 0) & (diff[1:] < 0)] = -1
+    df['Signal'] = signal  # 0 = Hold, 1 = Buy, -1 = Sell
+    
+    # Carry the position forward with a vectorized forward-fill: buys open
+    # a position (1), sells flatten it (0), holds inherit the prior state
+    pos = np.where(signal == 1, 1.0, np.where(signal == -1, 0.0, np.nan))
+    df['Position'] = pd.Series(pos, index=df.index).ffill().fillna(0).astype(np.int8)
     
     # Count signals
     buy_signals = (df['Signal'] == 1).sum()
@@ -145,21 +156,22 @@ def analyze_signals(data, short_window=50, long_window=200):
     dict
         Dictionary containing signal analysis
     """
-    # Get signal dates
-    buy_dates = data[data['Signal'] == 1].index.tolist()
-    sell_dates = data[data['Signal'] == -1].index.tolist()
-    
+    # Get signal dates (index the dates directly; no DataFrame filtering)
+    signals = data['Signal'].to_numpy()
+    buy_dates = data.index[signals == 1]
+    sell_dates = data.index[signals == -1]
+
     # Calculate time in market
     total_days = len(data)
-    days_in_position = (data['Position'] == 1).sum()
+    days_in_position = (data['Position'].to_numpy() == 1).sum()
     time_in_market = (days_in_position / total_days) * 100 if total_days > 0 else 0
-    
-    # Calculate average time between signals
-    all_signal_dates = sorted(buy_dates + sell_dates)
-    if len(all_signal_dates) > 1:
-        time_diffs = [(all_signal_dates[i] - all_signal_dates[i-1]).days 
-                     for i in range(1, len(all_signal_dates))]
-        avg_time_between_signals = np.mean(time_diffs)
+
+    # Average time between signals: one vectorized diff over the sorted
+    # signal dates instead of a Python loop over Timedelta objects
+    all_signal_dates = np.sort(np.concatenate(
+        [buy_dates.to_numpy(), sell_dates.to_numpy()])).astype('datetime64[D]')
+    if all_signal_dates.size > 1:
+        avg_time_between_signals = np.diff(all_signal_dates).astype('int64').mean()
     else:
         avg_time_between_signals = 0
     
@@ -180,22 +192,26 @@ def analyze_signals(data, short_window=50, long_window=200):
     return analysis
 
 
-def get_signal_summary(data):
+def get_signal_summary(data, analysis=None):
     """
     Get a readable summary of the trading signals.
-    
+
     Parameters:
     -----------
     data : pandas.DataFrame
         Data with signals
-    
+    analysis : dict, optional
+        Precomputed result of analyze_signals; passing it avoids a second
+        full-frame scan when the caller already ran the analysis
+
     Returns:
     --------
     str
         Formatted summary string
     """
-    analysis = analyze_signals(data)
-    
+    if analysis is None:
+        analysis = analyze_signals(data)
+
     summary = f"""
 Trading Signal Summary:
 ======================
@@ -244,15 +260,17 @@ def create_strategy_data(data, short_window=50, long_window=200, price_column='C
     print(f"Implementing Moving Average Crossover Strategy...")
     print(f"Short MA: {short_window} days, Long MA: {long_window} days")
     
-    # Calculate moving averages
-    df_with_ma = calculate_moving_averages(data, short_window, long_window, price_column)
-    
+    # One copy at the pipeline boundary; the steps below work in place
+    df_with_ma = calculate_moving_averages(data.copy(), short_window, long_window,
+                                           price_column, inplace=True)
+
     # Generate signals
     df_with_signals = generate_signals(df_with_ma, short_window, long_window)
-    
-    # Print summary
-    print(get_signal_summary(df_with_signals))
-    
+
+    # Analyze once and reuse for the printed summary
+    analysis = analyze_signals(df_with_signals, short_window, long_window)
+    print(get_signal_summary(df_with_signals, analysis))
+
     return df_with_signals
 
 